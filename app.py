@@ -5,11 +5,17 @@ Upload APV250 PDFs and get filled APV9T forms back.
 Supports both digital and scanned PDFs (via OCR).
 """
 
+import io
 import os
 import re
 import json
+import time
+import shutil
+import hashlib
+import secrets
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import date
 from pathlib import Path
 from functools import wraps
 
@@ -18,21 +24,77 @@ from pypdf import PdfReader, PdfWriter
 from werkzeug.utils import secure_filename
 from authlib.integrations.flask_client import OAuth
 
-# OCR support for scanned PDFs and images
+# OCR support for scanned PDFs and images - imported on first use, since digital PDFs never need it
+OCR_AVAILABLE = None  # Unknown until _load_ocr() has tried the imports
+pytesseract = convert_from_path = convert_from_bytes = Image = pdfium = None
+poppler_path = None  # Where pdf2image finds pdftoppm, if not on PATH
+_ocr_load_lock = threading.Lock()
+
+# With tesserocr installed (optional) tesseract runs in-process with its model kept loaded,
+# instead of pytesseract starting a tesseract process per call. One API per segmentation
+# mode ('--psm 6' or not), each used by one thread at a time. tesserocr installs signal
+# handlers on import, which only works from the main thread, so it can't be imported lazily.
+# One OpenMP thread per tesseract (process or API) - concurrent requests keep the other cores busy.
+# Must be set before libtesseract loads, which for tesserocr is at import.
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
 try:
-    import pytesseract
-    from pdf2image import convert_from_path
-    from PIL import Image
+    import tesserocr
+except (ImportError, ValueError):
+    tesserocr = None
+_tess_apis = {}  # psm6 -> (PyTessBaseAPI, Lock)
+_tess_osd = None  # (PyTessBaseAPI for orientation detection, Lock), alongside _tess_apis
+
+
+def _load_ocr() -> bool:
+    """Load the OCR libraries on first call. Returns OCR_AVAILABLE."""
+    global OCR_AVAILABLE
+    if OCR_AVAILABLE is not None:
+        return OCR_AVAILABLE
+    with _ocr_load_lock:
+        if OCR_AVAILABLE is None:
+            OCR_AVAILABLE = _import_ocr()
+    return OCR_AVAILABLE
+
+
+def _import_ocr() -> bool:
+    """Import the OCR libraries and point pytesseract at tesseract. Returns whether OCR works."""
+    global pytesseract, convert_from_path, convert_from_bytes, Image, pdfium, poppler_path, _tess_osd
+    try:
+        import pytesseract as _pytesseract
+        from pdf2image import convert_from_path as _convert_from_path, convert_from_bytes as _convert_from_bytes
+        from PIL import Image as _Image
+    except ImportError:
+        return False
     # Set Tesseract path based on platform
     import platform
     if platform.system() == 'Darwin':  # macOS
-        pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
-        os.environ['PATH'] = '/opt/homebrew/bin:' + os.environ.get('PATH', '')
+        _pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+        poppler_path = '/opt/homebrew/bin'
     else:  # Linux (production)
-        pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+        _pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'
+    pytesseract, Image = _pytesseract, _Image
+    convert_from_path, convert_from_bytes = _convert_from_path, _convert_from_bytes
+
+    # pypdfium2 (optional) renders pages in-process; otherwise pdf2image runs poppler's pdftoppm
+    try:
+        import pypdfium2 as _pdfium
+        pdfium = _pdfium
+    except ImportError:
+        pass
+
+    if tesserocr:
+        try:
+            for psm6, psm in ((False, tesserocr.PSM.AUTO), (True, tesserocr.PSM.SINGLE_BLOCK)):
+                # Same settings as TESSERACT_CONFIG
+                api = tesserocr.PyTessBaseAPI(psm=psm, oem=tesserocr.OEM.LSTM_ONLY)
+                api.SetVariable('tessedit_do_invert', '0')
+                _tess_apis[psm6] = (api, threading.Lock())
+            # OSD-only mode, so tesseract loads its orientation model (osd.traineddata) for this one
+            _tess_osd = (tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.OSD_ONLY), threading.Lock())
+        except RuntimeError:  # No tessdata where it looks - stay on pytesseract
+            _tess_apis.clear()
+    return True
+
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
@@ -65,6 +127,33 @@ app.config['UPLOAD_FOLDER'].mkdir(exist_ok=True)
 # Path to APV9T template
 APV9T_TEMPLATE = Path(__file__).parent / 'APV9T Form.pdf'
 
+# Parsed template, loaded on first use and shared by every fill in this process:
+# (size and mtime of the file it was parsed from, PdfReader, field names per page).
+# The field names let each page be sent only its own values. Re-parsed if the file changes
+_template = None
+_template_lock = threading.Lock()
+
+# Recent extraction results keyed by upload content, so /process-check then /process skips the second OCR
+EXTRACT_CACHE_SIZE = 64
+EXTRACT_CACHE_TTL = 300  # seconds
+_extract_cache = {}  # digest -> (time stored, vehicle data)
+_extract_cache_lock = threading.Lock()
+
+# Filled forms keyed by the template and their field values - an identical fill is just a file copy.
+# They hold sellers' names and addresses, so they expire after OUTPUT_TTL like the forms handed out
+FILL_CACHE_DIR = app.config['UPLOAD_FOLDER'] / 'fill_cache'
+FILL_CACHE_DIR.mkdir(exist_ok=True)
+FILL_CACHE_SIZE = 32  # files; oldest are removed first
+
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png'})
+ALLOWED_EXTENSIONS = IMAGE_EXTENSIONS | {'.pdf'}
+
+# How long a filled form stays in the upload folder for /download and /update-pdf
+OUTPUT_TTL = 3600  # seconds
+
+# pypdf writes a PDF in many small pieces; buffer them into few large writes
+PDF_WRITE_BUFFER = 1024 * 1024  # bytes
+
 # Default settings (used if database is empty)
 DEFAULT_SETTINGS = {
     "company_name": "Clutch Technologies Inc",
@@ -77,39 +166,69 @@ DEFAULT_SETTINGS = {
 }
 
 
-def init_db():
+# One settings connection per process, shared by its request threads
+_db_conn = None
+_db_lock = threading.Lock()
+
+# Settings change at human speed, so fills use an in-memory copy. A save clears it in the
+# process that made it; other workers pick the change up within SETTINGS_CACHE_TTL.
+SETTINGS_CACHE_TTL = 30  # seconds
+_settings_cache = None  # (time loaded, settings)
+
+
+def init_db(conn):
     """Initialize SQLite database for settings."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS settings
-                 (key TEXT PRIMARY KEY, value TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS settings
+                    (key TEXT PRIMARY KEY, value TEXT)''')
     conn.commit()
-    conn.close()
+
+
+def _db():
+    """This process's settings connection, opened on first use. Call with _db_lock held."""
+    global _db_conn
+    if _db_conn is None:
+        conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')  # Readers don't block on a settings save
+        conn.execute('PRAGMA synchronous=NORMAL')
+        init_db(conn)
+        _db_conn = conn
+    return _db_conn
+
+
+def _reset_db() -> None:
+    """SQLite connections must not be used across fork - a forked worker opens its own."""
+    global _db_conn, _db_lock
+    _db_conn = None
+    _db_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_db)
 
 
 def get_settings():
     """Get all settings from database."""
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT key, value FROM settings')
-    rows = c.fetchall()
-    conn.close()
-    settings = DEFAULT_SETTINGS.copy()
-    for key, value in rows:
-        settings[key] = value
-    return settings
+    global _settings_cache
+    now = time.monotonic()
+    with _db_lock:
+        if _settings_cache is None or now - _settings_cache[0] >= SETTINGS_CACHE_TTL:
+            rows = _db().execute('SELECT key, value FROM settings').fetchall()
+            settings = DEFAULT_SETTINGS.copy()
+            for key, value in rows:
+                settings[key] = value
+            _settings_cache = (now, settings)
+        return _settings_cache[1].copy()
 
 
 def save_settings(new_settings):
     """Save settings to database."""
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    for key, value in new_settings.items():
-        c.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
-    conn.commit()
-    conn.close()
+    global _settings_cache
+    with _db_lock:
+        conn = _db()
+        with conn:  # One transaction, committed on success
+            conn.executemany('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                             new_settings.items())
+        _settings_cache = None
 
 
 def get_purchaser():
@@ -138,129 +257,168 @@ def login_required(f):
 # Legacy PURCHASER variable for compatibility (now uses database)
 PURCHASER = DEFAULT_SETTINGS
 
+# Regex patterns used by extract_apv250_data, compiled once at import
+_RE_REG = re.compile(r'Registration Number[:\s]+(\d{7,8})')
+_RE_REG_LOOSE = re.compile(r'Registration Number[:\s]*(\d{7,8})')
+# Case-insensitive, so this already covers any 17-char alphanumeric run after "VIN"
+_RE_VIN = re.compile(r'VIN[:\s]*([A-HJ-NPR-Z0-9IOSl]{17})', re.IGNORECASE)
+_RE_YEAR = re.compile(r'Year[:\s]*(\d{4})')
+_RE_MAKES = (
+    re.compile(r'Make[:\s]*([A-Za-z]+)'),
+    re.compile(r'Make\s+([A-Za-z]+)'),
+    re.compile(r'[Mm]ake[:\s]*([A-Za-z]{3,})'),
+)
+_RE_MODEL = re.compile(r'Model[:\s]*([A-Za-z0-9\-]+)')
+# Body Style - handle OCR errors like "Body Sle" for "Body Style"
+_RE_BODY = (
+    re.compile(r'Body Styl?e?[:\s]*([A-Za-z0-9 ]+?)(?:\n|VIC|Colour|$)', re.IGNORECASE),
+    re.compile(r'Body Sl[ea]?[:\s]*(\d+ ?Door ?[A-Za-z]+)', re.IGNORECASE),  # "Body Sle 4 Door Sea"
+    re.compile(r'(\d+ ?Door ?(?:Sedan|Coupe|Hatchback|SUV|Truck|Van|Wagon|Conv|Sea|Sed))', re.IGNORECASE),
+)
+_RE_VIC = re.compile(r'VIC[:\s]*([A-Z0-9]{4,8})')
+_RE_COLOUR = re.compile(r'Colour[:\s]*([A-Za-z]+)')
+_RE_FUEL = re.compile(r'Fuel Type[:\s]*([A-Za-z]+)')
+_RE_NET_WEIGHT = re.compile(r'Net Weight[:\s\(kg\)]*([0-9,]+)')
+_RE_NUM_OWNERS = re.compile(r'Number of Owners[:\s]*(\d+)')
+_RE_OWNER_SECTION = re.compile(r'Registered Owner.*?(?=This Certificate|Number of Owners|$)', re.DOTALL | re.IGNORECASE)
+_RE_CAPS_NAMES = re.compile(r'\n([A-Z]{2,}(?:\s+[A-Z]{2,})+)')
+# Common surnames, for spotting an owner name when there's no "Registered Owner" section
+_SURNAMES = frozenset({
+    'SACHDEV', 'SINGH', 'KUMAR', 'KAUR', 'GILL', 'DHILLON', 'GREWAL', 'SANDHU', 'SIDHU', 'BRAR',
+    'MANN', 'CHEEMA', 'DHALIWAL', 'BAJWA', 'JOHAL', 'KHANNA', 'SHARMA', 'PATEL', 'WONG', 'CHEN',
+    'LEE', 'WANG', 'LI', 'ZHANG', 'LIU', 'YANG', 'HUANG', 'WU', 'ZHOU', 'XU', 'MA', 'ZHU', 'HU',
+    'LIN', 'GUO', 'SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'MILLER', 'DAVIS', 'WILSON',
+    'ANDERSON', 'TAYLOR', 'THOMAS', 'MOORE', 'MARTIN', 'JACKSON', 'WHITE', 'HARRIS', 'CLARK',
+    'LEWIS', 'WALKER', 'HALL', 'YOUNG', 'KING', 'WRIGHT', 'HILL', 'SCOTT', 'GREEN', 'ADAMS',
+    'BAKER', 'NELSON', 'CARTER', 'MITCHELL', 'ROBERTS', 'TURNER', 'PHILLIPS', 'CAMPBELL',
+    'PARKER', 'EVANS', 'EDWARDS', 'COLLINS', 'STEWART', 'MORRIS', 'ROGERS', 'REED', 'COOK',
+    'MORGAN', 'BELL', 'MURPHY', 'BAILEY', 'RIVERA', 'COOPER', 'RICHARDSON', 'COX', 'HOWARD',
+    'WARD', 'TORRES', 'PETERSON', 'GRAY', 'RAMIREZ', 'JAMES', 'WATSON', 'BROOKS', 'KELLY',
+    'SANDERS', 'PRICE', 'BENNETT', 'WOOD', 'BARNES', 'ROSS', 'HENDERSON', 'COLEMAN', 'JENKINS',
+    'PERRY', 'POWELL', 'LONG', 'PATTERSON', 'HUGHES', 'FLORES', 'WASHINGTON', 'BUTLER',
+    'SIMMONS', 'FOSTER', 'GONZALES', 'BRYANT', 'ALEXANDER', 'RUSSELL', 'GRIFFIN', 'DIAZ',
+    'HAYES',
+})
+_RE_CAPS_WORD = re.compile(r'\b[A-Z]+\b')
+_RE_CAPS_RUN = re.compile(r'[A-Z\s]+')
+# "Location Address" format from digital PDFs: "Location Address 1: 305-3142 ST. JOHNS ST, PORT MOODY"
+_RE_LOC_ADDR = re.compile(r'Location Address \d?:?\s*(\d+[- ]\d+[^,\n]+|[^,\n]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT))', re.IGNORECASE)
+_RE_DIGIT = re.compile(r'\d')
+# Street address patterns (single line only - no \s, use space)
+_RE_ADDRS = (
+    # Unit-Number format with periods: 305-3142 ST. JOHNS ST
+    re.compile(r'(\d{1,5}[- ]\d{1,5} [A-Z\.]+[A-Z\. ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT))', re.IGNORECASE),
+    # Standard with periods: 1234 ST. JAMES ST
+    re.compile(r'(\d{1,5} [A-Z\.]+[A-Z\. ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))', re.IGNORECASE),
+    # Unit-Number format: 1234-5678 STREET NAME ST
+    re.compile(r'(\d{1,5}[- ]\d{1,5} [A-Z]+ (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))', re.IGNORECASE),
+    # Standard: 1234 STREET NAME ST
+    re.compile(r'(\d{1,5} [A-Z]+[A-Z ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))', re.IGNORECASE),
+)
+# OCR junk at the end of a street (random letters, but not valid suffixes)
+_RE_STREET_JUNK = re.compile(r' (?!ST|RD|DR|PL|CT|AVE|WAY)[A-Z]{1,2}$')
+_BC_CITIES = r'(ABBOTSFORD|VANCOUVER|RICHMOND|BURNABY|SURREY|COQUITLAM|LANGLEY|VICTORIA|KELOWNA|KAMLOOPS|NANAIMO|CHILLIWACK|MAPLE RIDGE|NEW WESTMINSTER|NORTH VANCOUVER|WEST VANCOUVER|DELTA|PORT COQUITLAM|MISSION|WHITE ROCK|PENTICTON|VERNON|COURTENAY|PORT MOODY|PITT MEADOWS)'
+# CITY BC POSTAL (allow OCR errors in postal)
+_RE_CITY_POSTAL = re.compile(_BC_CITIES + r'\s+BC\s+([A-Z0-9]{3}\s*[A-Z0-9]{3})', re.IGNORECASE)
+
+# Common OCR errors for makes
+MAKE_FIXES = {
+    'Cadlhae': 'CADILLAC', 'Cadllac': 'CADILLAC', 'Cadlllac': 'CADILLAC',
+    'Chevroiet': 'CHEVROLET', 'Toyola': 'TOYOTA', 'Honds': 'HONDA',
+}
 
-def extract_apv250_data(file_path: str) -> dict:
-    """Extract vehicle and owner data from APV250 PDF or image."""
-    import gc  # For memory management
-    file_lower = file_path.lower()
+FUEL_CODES = {
+    'GASOLINE': 'G', 'GAS': 'G', 'DIESEL': 'D', 'ELECTRIC': 'E',
+    'HYBRID': 'L', 'PROPANE': 'P', 'NATURAL': 'N',
+}
 
-    # Handle image files directly with OCR
-    if file_lower.endswith(('.jpg', '.jpeg', '.png')):
-        if not OCR_AVAILABLE:
-            return {}
-        from PIL import ImageOps
-        image = Image.open(file_path)
-        # Fix EXIF orientation (phone photos are often stored rotated)
-        image = ImageOps.exif_transpose(image)
-        # Resize large images to save memory (max 1500px wide)
-        if image.width > 1500:
-            ratio = 1500 / image.width
-            image = image.resize((1500, int(image.height * ratio)), Image.LANCZOS)
-
-        # Auto-rotation: try different angles and pick the one that finds key fields
-        best_text = ""
-        for rotation in [0, 90, 270, 180]:  # Try most common rotations first
-            rotated = image.rotate(rotation, expand=True) if rotation != 0 else image
-            text = pytesseract.image_to_string(rotated)
-            # Check if we found key vehicle document fields
-            if 'VIN' in text.upper() or 'REGISTRATION' in text.upper() or 'VEHICLE' in text.upper():
-                # Found good orientation - do full OCR
-                text_psm6 = pytesseract.image_to_string(rotated, config='--psm 6')
-                best_text = text + "\n" + text_psm6
-                break
-            # Keep track of text with most content as fallback
-            if len(text) > len(best_text):
-                best_text = text
-            if rotation != 0:
-                del rotated
+_OCR_JUNK = str.maketrans('', '', '|[]{}')  # OCR artifacts, deleted outright
 
-        text = best_text
-        del image  # Free memory
-        gc.collect()
-    else:
-        # Handle PDF files
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-
-        # If no text extracted (scanned PDF), try OCR with lower DPI to save memory
-        if len(text.strip()) < 50 and OCR_AVAILABLE:
-            text = ""
-            # Use 150 DPI instead of 300 - still readable, uses 75% less memory
-            # Only process first page (registrations are single page)
-            images = convert_from_path(file_path, dpi=150, first_page=1, last_page=1)
-            for image in images:
-                text += pytesseract.image_to_string(image) + "\n"
-                text += pytesseract.image_to_string(image, config='--psm 6') + "\n"
-                del image  # Free memory immediately
-            del images
-            gc.collect()
+# Common OCR misreads: digits read as letters in VINs, and letter/digit swaps in
+# postal codes (which alternate Letter-Digit-Letter Digit-Letter-Digit)
+_VIN_FIXES = str.maketrans('IOSl', '1051')
+_POSTAL_LETTER_FIXES = str.maketrans('2501', 'ZSOI')
+_POSTAL_DIGIT_FIXES = str.maketrans('ZSOIl', '25011')
 
+# LSTM engine only, and skip the inverted-text retry (registrations are dark text on light paper)
+TESSERACT_CONFIG = '--oem 1 -c tessedit_do_invert=0'
+
+# Resolutions we hand tesseract, so it doesn't have to guess one from the image
+PDF_RENDER_DPI = 150  # Still readable, and 75% less memory than 300
+PHOTO_DPI = 200  # A letter-size page photographed at PHOTO_MAX_SIDE px on its long side; scaled by size
+PHOTO_MAX_SIDE = 2000
+
+# Words that show a photo is the right way up - OCR of a rotated page finds none of them
+DOC_KEYWORDS = ('VIN', 'REGISTRATION', 'VEHICLE')
+
+# Once these are found there is no need to read further pages
+KEY_FIELDS = frozenset({'vin', 'registration_number', 'owner_name', 'owner_postal'})
+
+
+def _surname_names(text: str) -> list:
+    """Runs of capitals and whitespace that start with a known surname, in order of appearance.
+
+    One pass over the capitalised words with a set lookup each, rather than trying every
+    surname at every position.
+    """
+    names = []
+    end = 0
+    for word in _RE_CAPS_WORD.finditer(text):
+        if word.start() < end or word.group() not in _SURNAMES:
+            continue
+        run = _RE_CAPS_RUN.match(text, word.start())
+        if run.end() > word.end():  # Needs something after the surname (e.g. first name)
+            names.append(run.group())
+            end = run.end()
+    return names
+
+
+def _parse_apv250_text(text: str) -> dict:
+    """Parse vehicle and owner fields out of APV250 text (digital or OCR)."""
     data = {}
 
     # Clean up OCR text - normalize whitespace
-    text_clean = re.sub(r'[|\[\]{}]', '', text)  # Remove OCR artifacts
+    text_clean = text.translate(_OCR_JUNK)  # Remove OCR artifacts
 
     # Registration Number - try multiple patterns
-    match = re.search(r'Registration Number[:\s]+(\d{7,8})', text_clean)
+    match = _RE_REG.search(text_clean)
     if not match:
-        match = re.search(r'Registration Number[:\s]*(\d{7,8})', text_clean)
+        match = _RE_REG_LOOSE.search(text_clean)
     if match:
         data['registration_number'] = match.group(1)
 
     # VIN - be very flexible with OCR errors
     # Look for 17-character sequences that look like VINs
-    match = re.search(r'VIN[:\s]*([A-HJ-NPR-Z0-9IOSl]{17})', text_clean, re.IGNORECASE)
-    if not match:
-        # Try finding any 17-char alphanumeric after VIN
-        match = re.search(r'VIN[:\s]*([A-Z0-9]{17})', text_clean, re.IGNORECASE)
+    match = _RE_VIN.search(text_clean)
     if match:
         vin = match.group(1).upper()
         # Fix common OCR errors
-        vin = vin.replace('I', '1').replace('O', '0').replace('S', '5').replace('l', '1')
+        vin = vin.translate(_VIN_FIXES)
         data['vin'] = vin
 
     # Year - look for 4-digit year near "Year" label or in 201x/202x range
-    match = re.search(r'Year[:\s]*(\d{4})', text_clean)
+    match = _RE_YEAR.search(text_clean)
     if match:
         data['year'] = match.group(1)
 
     # Make - be flexible with OCR variations
-    make_patterns = [
-        r'Make[:\s]*([A-Za-z]+)',
-        r'Make\s+([A-Za-z]+)',
-        r'[Mm]ake[:\s]*([A-Za-z]{3,})',
-    ]
-    for pattern in make_patterns:
-        match = re.search(pattern, text_clean)
+    for pattern in _RE_MAKES:
+        match = pattern.search(text_clean)
         if match:
             make = match.group(1).strip()
-            # Fix common OCR errors for makes
-            make_fixes = {
-                'Cadlhae': 'CADILLAC', 'Cadllac': 'CADILLAC', 'Cadlllac': 'CADILLAC',
-                'Chevroiet': 'CHEVROLET', 'Toyola': 'TOYOTA', 'Honds': 'HONDA',
-            }
-            make = make_fixes.get(make, make).upper()
+            make = MAKE_FIXES.get(make, make).upper()
             if len(make) >= 2:
                 data['make'] = make
                 break
 
     # Model - handle alphanumeric models
-    match = re.search(r'Model[:\s]*([A-Za-z0-9\-]+)', text_clean)
+    match = _RE_MODEL.search(text_clean)
     if match:
         data['model'] = match.group(1).upper()
 
-    # Body Style - try multiple patterns (handle OCR errors like "Body Sle" for "Body Style")
-    body_patterns = [
-        r'Body Styl?e?[:\s]*([A-Za-z0-9 ]+?)(?:\n|VIC|Colour|$)',
-        r'Body Sl[ea]?[:\s]*(\d+ ?Door ?[A-Za-z]+)',  # "Body Sle 4 Door Sea"
-        r'(\d+ ?Door ?(?:Sedan|Coupe|Hatchback|SUV|Truck|Van|Wagon|Conv|Sea|Sed))',
-    ]
-    for pattern in body_patterns:
-        match = re.search(pattern, text_clean, re.IGNORECASE)
+    # Body Style - try multiple patterns
+    for pattern in _RE_BODY:
+        match = pattern.search(text_clean)
         if match:
             body = match.group(1).strip().upper()
             # Normalize to standard body types
@@ -286,44 +444,40 @@ def extract_apv250_data(file_path: str) -> dict:
             break
     # Also try VIC code as fallback
     if 'body_style' not in data:
-        match = re.search(r'VIC[:\s]*([A-Z0-9]{4,8})', text_clean)
+        match = _RE_VIC.search(text_clean)
         if match:
             data['body_style'] = match.group(1).strip().upper()
 
     # Colour - be flexible
-    match = re.search(r'Colour[:\s]*([A-Za-z]+)', text_clean)
+    match = _RE_COLOUR.search(text_clean)
     if match:
         data['colour'] = match.group(1).upper()
 
     # Fuel Type
-    match = re.search(r'Fuel Type[:\s]*([A-Za-z]+)', text_clean)
+    match = _RE_FUEL.search(text_clean)
     if match:
         fuel = match.group(1).upper()
-        fuel_codes = {
-            'GASOLINE': 'G', 'GAS': 'G', 'DIESEL': 'D', 'ELECTRIC': 'E',
-            'HYBRID': 'L', 'PROPANE': 'P', 'NATURAL': 'N',
-        }
-        data['fuel_code'] = fuel_codes.get(fuel, 'G')
+        data['fuel_code'] = FUEL_CODES.get(fuel, 'G')
         data['fuel_type'] = fuel
     else:
         data['fuel_code'] = 'G'
 
     # Net Weight
-    match = re.search(r'Net Weight[:\s\(kg\)]*([0-9,]+)', text_clean)
+    match = _RE_NET_WEIGHT.search(text_clean)
     if match:
         data['net_weight'] = match.group(1).replace(',', '')
 
     # Number of owners
-    num_owners_match = re.search(r'Number of Owners[:\s]*(\d+)', text_clean)
+    num_owners_match = _RE_NUM_OWNERS.search(text_clean)
     num_owners = int(num_owners_match.group(1)) if num_owners_match else 1
 
     # Owner Names - look for LASTNAME FIRSTNAME patterns after "Registered Owner" or "Owner"
     # Pattern for names in ALL CAPS
-    owner_section = re.search(r'Registered Owner.*?(?=This Certificate|Number of Owners|$)', text_clean, re.DOTALL | re.IGNORECASE)
+    owner_section = _RE_OWNER_SECTION.search(text_clean)
     if owner_section:
         section = owner_section.group(0)
         # Find names: ALL CAPS words that look like names (LASTNAME FIRSTNAME)
-        name_matches = re.findall(r'\n([A-Z]{2,}(?:\s+[A-Z]{2,})+)', section)
+        name_matches = _RE_CAPS_NAMES.findall(section)
         if name_matches:
             data['owner_name'] = name_matches[0].strip()
             if num_owners > 1 and len(name_matches) > 1:
@@ -331,45 +485,33 @@ def extract_apv250_data(file_path: str) -> dict:
 
     # If no owner found, try alternative pattern
     if 'owner_name' not in data:
-        matches = re.findall(r'(?:SACHDEV|SINGH|KUMAR|KAUR|GILL|DHILLON|GREWAL|SANDHU|SIDHU|BRAR|MANN|CHEEMA|DHALIWAL|BAJWA|JOHAL|KHANNA|SHARMA|PATEL|WONG|CHEN|LEE|WANG|LI|ZHANG|LIU|YANG|HUANG|WU|ZHOU|XU|MA|ZHU|HU|LIN|GUO|SMITH|JOHNSON|WILLIAMS|BROWN|JONES|MILLER|DAVIS|WILSON|ANDERSON|TAYLOR|THOMAS|MOORE|MARTIN|JACKSON|WHITE|HARRIS|CLARK|LEWIS|WALKER|HALL|YOUNG|KING|WRIGHT|HILL|SCOTT|GREEN|ADAMS|BAKER|NELSON|CARTER|MITCHELL|ROBERTS|TURNER|PHILLIPS|CAMPBELL|PARKER|EVANS|EDWARDS|COLLINS|STEWART|MORRIS|ROGERS|REED|COOK|MORGAN|BELL|MURPHY|BAILEY|RIVERA|COOPER|RICHARDSON|COX|HOWARD|WARD|TORRES|PETERSON|GRAY|RAMIREZ|JAMES|WATSON|BROOKS|KELLY|SANDERS|PRICE|BENNETT|WOOD|BARNES|ROSS|HENDERSON|COLEMAN|JENKINS|PERRY|POWELL|LONG|PATTERSON|HUGHES|FLORES|WASHINGTON|BUTLER|SIMMONS|FOSTER|GONZALES|BRYANT|ALEXANDER|RUSSELL|GRIFFIN|DIAZ|HAYES)[A-Z\s]+', text_clean)
+        matches = _surname_names(text_clean)
         if matches:
             data['owner_name'] = matches[0].strip()
             if num_owners > 1 and len(matches) > 1:
                 data['owner_name_2'] = matches[1].strip()
 
     # Owner Address - try multiple patterns
-    # First try "Location Address" format from digital PDFs: "Location Address 1: 305-3142 ST. JOHNS ST, PORT MOODY"
-    loc_match = re.search(r'Location Address \d?:?\s*(\d+[- ]\d+[^,\n]+|[^,\n]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT))', text_clean, re.IGNORECASE)
+    # First try "Location Address" format from digital PDFs
+    loc_match = _RE_LOC_ADDR.search(text_clean)
     if loc_match:
         street = loc_match.group(1).strip().upper()
-        if len(street) > 5 and len(street) < 60 and re.search(r'\d', street):
+        if len(street) > 5 and len(street) < 60 and _RE_DIGIT.search(street):
             data['owner_street'] = street
 
-    # If not found, try other patterns (single line only - no \s, use space)
+    # If not found, try other patterns
     if 'owner_street' not in data:
-        addr_patterns = [
-            # Unit-Number format with periods: 305-3142 ST. JOHNS ST
-            r'(\d{1,5}[- ]\d{1,5} [A-Z\.]+[A-Z\. ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT))',
-            # Standard with periods: 1234 ST. JAMES ST
-            r'(\d{1,5} [A-Z\.]+[A-Z\. ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))',
-            # Unit-Number format: 1234-5678 STREET NAME ST
-            r'(\d{1,5}[- ]\d{1,5} [A-Z]+ (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))',
-            # Standard: 1234 STREET NAME ST
-            r'(\d{1,5} [A-Z]+[A-Z ]* (?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT|STREET|AVENUE|ROAD|DRIVE))',
-        ]
-        for pattern in addr_patterns:
-            addr_match = re.search(pattern, text_clean, re.IGNORECASE)
+        for pattern in _RE_ADDRS:
+            addr_match = pattern.search(text_clean)
             if addr_match:
                 street = addr_match.group(1).strip().upper()
-                # Clean up any OCR junk at the end (random letters, but not valid suffixes)
-                street = re.sub(r' (?!ST|RD|DR|PL|CT|AVE|WAY)[A-Z]{1,2}$', '', street)
+                street = _RE_STREET_JUNK.sub('', street)
                 if len(street) > 5 and len(street) < 60:  # Valid street address
                     data['owner_street'] = street
                     break
 
-    # City and postal - look for CITY BC POSTAL pattern (allow OCR errors in postal)
-    bc_cities = r'(ABBOTSFORD|VANCOUVER|RICHMOND|BURNABY|SURREY|COQUITLAM|LANGLEY|VICTORIA|KELOWNA|KAMLOOPS|NANAIMO|CHILLIWACK|MAPLE RIDGE|NEW WESTMINSTER|NORTH VANCOUVER|WEST VANCOUVER|DELTA|PORT COQUITLAM|MISSION|WHITE ROCK|PENTICTON|VERNON|COURTENAY|PORT MOODY|PITT MEADOWS)'
-    postal_match = re.search(bc_cities + r'\s+BC\s+([A-Z0-9]{3}\s*[A-Z0-9]{3})', text_clean, re.IGNORECASE)
+    # City and postal - look for CITY BC POSTAL pattern
+    postal_match = _RE_CITY_POSTAL.search(text_clean)
     if postal_match:
         data['owner_city'] = postal_match.group(1).strip().upper()
         data['owner_province'] = 'BC'
@@ -378,42 +520,303 @@ def extract_apv250_data(file_path: str) -> dict:
         # BC postal codes are: Letter-Digit-Letter Digit-Letter-Digit (V#X #X#)
         # Fix common OCR substitutions
         if len(postal) == 6:
-            fixed = ''
-            for i, c in enumerate(postal):
-                if i in [0, 2, 4]:  # Should be letter
-                    if c == '2': fixed += 'Z'
-                    elif c == '5': fixed += 'S'
-                    elif c == '0': fixed += 'O'
-                    elif c == '1': fixed += 'I'
-                    else: fixed += c
-                else:  # Should be digit
-                    if c == 'Z': fixed += '2'
-                    elif c == 'S': fixed += '5'
-                    elif c == 'O': fixed += '0'
-                    elif c == 'I': fixed += '1'
-                    elif c == 'l': fixed += '1'
-                    else: fixed += c
-            postal = fixed[:3] + ' ' + fixed[3:]
+            letters = postal[0::2].translate(_POSTAL_LETTER_FIXES)  # Should be letters
+            digits = postal[1::2].translate(_POSTAL_DIGIT_FIXES)  # Should be digits
+            postal = f"{letters[0]}{digits[0]}{letters[1]} {digits[1]}{letters[2]}{digits[2]}"
         data['owner_postal'] = postal
 
     return data
 
 
-def fill_apv9t(vehicle_data: dict, output_path: str, sale_date: str = None, form_data: dict = None) -> None:
-    """Fill APV9T form with extracted vehicle data."""
+def _binarize(image):
+    """Convert to grayscale and apply a global Otsu threshold, giving tesseract clean black-on-white input."""
+    gray = image.convert('L')
+    hist = gray.histogram()
+    total = sum(hist)
+    sum_all = sum(level * count for level, count in enumerate(hist))
+    sum_dark = weight_dark = 0
+    threshold, best_variance = 0, 0.0
+    for level, count in enumerate(hist):
+        weight_dark += count
+        if weight_dark == 0:
+            continue
+        weight_light = total - weight_dark
+        if weight_light == 0:
+            break
+        sum_dark += level * count
+        mean_dark = sum_dark / weight_dark
+        mean_light = (sum_all - sum_dark) / weight_light
+        variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+        if variance > best_variance:
+            threshold, best_variance = level, variance
+    return gray.point(lambda p: 255 if p > threshold else 0)
+
+
+def _tesseract_text(image, psm6: bool = False, dpi: int = None) -> str:
+    """OCR an image with default or --psm 6 (single block) segmentation."""
+    if _tess_apis:
+        api, lock = _tess_apis[psm6]
+        with lock:
+            api.SetImage(image)
+            if dpi:
+                api.SetSourceResolution(dpi)
+            return api.GetUTF8Text()
+    config = TESSERACT_CONFIG + (' --psm 6' if psm6 else '') + (f' --dpi {dpi}' if dpi else '')
+    return pytesseract.image_to_string(image, config=config)
+
+
+def _render_first_page(file_path):
+    """Rasterize page 1 of a PDF (path or file object) to a grayscale image at PDF_RENDER_DPI."""
+    if not isinstance(file_path, str):
+        file_path.seek(0)
+    if pdfium:
+        source = file_path if isinstance(file_path, str) else file_path.read()
+        with pdfium.PdfDocument(source) as doc:
+            # PDFium's scale is relative to the PDF's 72 units per inch
+            return doc[0].render(scale=PDF_RENDER_DPI / 72, grayscale=True).to_pil()
+    if isinstance(file_path, str):
+        images = convert_from_path(file_path, dpi=PDF_RENDER_DPI, first_page=1, last_page=1,
+                                   grayscale=True, poppler_path=poppler_path)
+    else:
+        images = convert_from_bytes(file_path.read(), dpi=PDF_RENDER_DPI, first_page=1, last_page=1,
+                                    grayscale=True, poppler_path=poppler_path)
+    return images[0]
+
+
+def _detect_rotation(image):
+    """Counter-clockwise rotation (0/90/180/270) that makes the text upright, or None if OSD fails."""
+    if _tess_osd:
+        api, lock = _tess_osd
+        with lock:
+            api.SetImage(image)
+            osd = api.DetectOrientationScript()
+        # None with no osd.traineddata, or too little text to tell. orient_deg is how far the
+        # image is turned clockwise, which is what PIL's rotate() (counter-clockwise) undoes
+        return osd['orient_deg'] if osd else None
+    try:
+        osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+    except (pytesseract.TesseractError, pytesseract.TesseractNotFoundError):
+        return None  # No osd.traineddata, too little text to tell, or no tesseract binary at all
+    # OSD reports the clockwise rotation needed; PIL's rotate() turns counter-clockwise
+    return -osd['rotate'] % 360
+
+
+def extract_apv250_data(file_path, filename: str = None) -> dict:
+    """Extract vehicle and owner data from APV250 PDF or image.
+
+    file_path may also be a binary file object (e.g. an upload's stream), in which case
+    filename gives the original name so the file type can be told from its extension.
+    """
+    extension = os.path.splitext(filename or file_path)[1].lower()
+
+    # Handle image files directly with OCR
+    if extension in IMAGE_EXTENSIONS:
+        if not _load_ocr():
+            return {}
+        from PIL import ImageOps
+        with Image.open(file_path) as original:
+            # JPEGs can be decoded straight to grayscale at 1/2, 1/4 or 1/8 scale - far cheaper
+            # than decoding a full 12MP photo and shrinking it afterwards (no-op for PNG)
+            scale = PHOTO_MAX_SIDE / max(original.size)
+            if scale < 1:
+                original.draft('L', (int(original.width * scale), int(original.height * scale)))
+            # Fix EXIF orientation (phone photos are often stored rotated); always a new image
+            image = ImageOps.exif_transpose(original)
+        # Shrink large images to save memory and OCR time (max 2000px on the long side)
+        image.thumbnail((PHOTO_MAX_SIDE, PHOTO_MAX_SIDE), Image.BILINEAR)
+        image = _binarize(image)
+        # The page fills the photo, so its resolution follows from the (possibly reduced) size -
+        # a small photo isn't 200 DPI, and overstating it makes tesseract drop small text
+        photo_dpi = round(PHOTO_DPI * max(image.size) / PHOTO_MAX_SIDE)
+
+        # Auto-rotation: try different angles and pick the one that finds key fields.
+        # Start with the angle tesseract's orientation detection suggests, if it manages one -
+        # when it's right that's the only full OCR pass we need
+        rotations = [0, 90, 270, 180]  # Most common rotations first
+        detected = _detect_rotation(image)
+        if detected:
+            rotations.remove(detected)
+            rotations.insert(0, detected)
+        best_text = ""
+        for rotation in rotations:
+            rotated = image.rotate(rotation, expand=True) if rotation != 0 else image
+            text = _tesseract_text(rotated, dpi=photo_dpi)
+            # Check if we found key vehicle document fields
+            upper = text.upper()
+            if any(keyword in upper for keyword in DOC_KEYWORDS):
+                # Found good orientation - only do a block-mode pass if key fields are still missing
+                if not KEY_FIELDS <= _parse_apv250_text(text).keys():
+                    text += "\n" + _tesseract_text(rotated, psm6=True, dpi=photo_dpi)
+                best_text = text
+                break
+            # Keep track of text with most content as fallback
+            if len(text) > len(best_text):
+                best_text = text
+            if rotation != 0:
+                del rotated
+
+        text = best_text
+        del image  # Free memory
+        return _parse_apv250_text(text)
+
+    # Handle PDF files - parse as pages come in and stop once the key fields are found
+    reader = PdfReader(file_path)
+    parts = []
+    data = {}
+    for page_number, page in enumerate(reader.pages):
+        page_text = page.extract_text()
+        if page_text:
+            parts.append(page_text)
+            data = _parse_apv250_text("\n".join(parts))
+            if KEY_FIELDS <= data.keys():
+                return data
+        if page_number == 0 and len((page_text or "").strip()) < 50 and _load_ocr():
+            break  # First page has no text layer to speak of - it's a scan, go straight to OCR
+    text = "\n".join(parts)
+
+    # If no text extracted (scanned PDF), try OCR with lower DPI to save memory
+    if len(text.strip()) < 50 and _load_ocr():
+        # Rendered at PDF_RENDER_DPI rather than 300 to save memory
+        # Only process first page (registrations are single page)
+        # Render straight to grayscale - a third of the RGB data, and tesseract greys it anyway -
+        # then threshold it like a photo, so tesseract gets clean black-on-white text
+        image = _binarize(_render_first_page(file_path))
+        # A registration is one uniform block of text, which is what --psm 6 is for; only fall
+        # back to a second, default-segmentation pass if that leaves key fields missing
+        text = _tesseract_text(image, psm6=True, dpi=PDF_RENDER_DPI)
+        if not KEY_FIELDS <= _parse_apv250_text(text).keys():
+            text += "\n" + _tesseract_text(image, dpi=PDF_RENDER_DPI)
+        del image  # Free memory immediately
+    elif parts:
+        return data
+
+    return _parse_apv250_text(text)
+
+
+def _extract_cached(stream, filename: str) -> dict:
+    """extract_apv250_data, reusing the result for a file with the same content seen recently."""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: stream.read(65536), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    key = digest.hexdigest()
+
+    now = time.monotonic()
+    with _extract_cache_lock:
+        hit = _extract_cache.get(key)
+        if hit and now - hit[0] < EXTRACT_CACHE_TTL:
+            return dict(hit[1])
+
+    data = extract_apv250_data(stream, filename)
+
+    with _extract_cache_lock:
+        for stale in [k for k, (stored, _) in _extract_cache.items() if now - stored >= EXTRACT_CACHE_TTL]:
+            del _extract_cache[stale]
+        while len(_extract_cache) >= EXTRACT_CACHE_SIZE:
+            del _extract_cache[next(iter(_extract_cache))]  # Oldest first (insertion order)
+        _extract_cache[key] = (now, data)
+    return dict(data)
+
+
+def _page_field_names(page) -> frozenset:
+    """Names of the form fields with a widget on this page."""
+    names = set()
+    for annotation in page.get('/Annots', ()):
+        annotation = annotation.get_object()
+        if annotation.get('/Subtype') != '/Widget':
+            continue
+        # A widget is either the field itself or a kid of it
+        field = annotation if '/T' in annotation else annotation.get('/Parent')
+        if field is not None:
+            names.add(field.get_object()['/T'])
+    return frozenset(names)
+
+
+def _current_template() -> tuple:
+    """The parsed APV9T template as (stamp, reader, page field names), re-parsed if the file changed."""
+    global _template
+    stat = APV9T_TEMPLATE.stat()
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    with _template_lock:
+        if _template is None or _template[0] != stamp:
+            # Published as one tuple, so a worker forked mid-parse never sees a reader
+            # without its field index (and fills blank forms)
+            reader = PdfReader(str(APV9T_TEMPLATE))
+            _template = (stamp, reader, [_page_field_names(page) for page in reader.pages])
+        return _template
+
+
+def _clone_template(reader: PdfReader) -> PdfWriter:
+    """Return a fresh PdfWriter holding a copy of a template from _current_template."""
+    # pypdf resolves objects lazily and caches them on the reader, so serialize access
+    with _template_lock:
+        writer = PdfWriter()
+        writer.clone_document_from_reader(reader)
+    return writer
+
+
+# OCR is loaded on first use, so workers that only ever see digital PDFs never pay for it.
+# Set WARM_UP_OCR=1 to load it at startup instead (worth it under gunicorn --preload, where
+# the workers share what the parent loaded)
+WARM_UP_OCR = os.environ.get('WARM_UP_OCR') == '1'
+
+
+def _warm_up() -> None:
+    """Pay one-time setup (template parse, and OCR imports if WARM_UP_OCR) before the first request needs it."""
+    try:
+        _clone_template(_current_template()[1])
+    except Exception:
+        pass  # A missing template is reported by /health and by the fill itself
+    if WARM_UP_OCR:
+        _load_ocr()
+
+
+def _reset_warm_up_locks() -> None:
+    """A worker forked while warm-up held a lock would otherwise inherit it locked, forever.
+
+    Whatever warm-up hadn't finished is simply redone in the worker on first use.
+    """
+    global _template_lock, _ocr_load_lock
+    _template_lock = threading.Lock()
+    _ocr_load_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_warm_up_locks)
+
+# Flask has no before_first_request any more - warm up in the background at import,
+# which also runs before the fork when gunicorn uses --preload
+threading.Thread(target=_warm_up, name='warm-up', daemon=True).start()
+
+
+_today_cache = (None, '')  # (date, that date as DD-MM-YYYY)
+
+
+def _today_text() -> str:
+    """Today's date as DD-MM-YYYY, formatted once per day rather than once per form."""
+    global _today_cache
+    today = date.today()
+    cached_day, text = _today_cache
+    if cached_day != today:
+        text = today.strftime("%d-%m-%Y")
+        _today_cache = (today, text)
+    return text
+
+
+def fill_apv9t(vehicle_data: dict, output, sale_date: str = None, form_data: dict = None) -> None:
+    """Fill APV9T form with extracted vehicle data.
+
+    output is a path to save the form to, or a binary file object to write it into.
+    """
     # Get purchaser info from database settings
     purchaser = get_purchaser()
 
-    reader = PdfReader(str(APV9T_TEMPLATE))
-    writer = PdfWriter()
-    writer.clone_document_from_reader(reader)
-
     if sale_date:
         # Convert from YYYY-MM-DD (HTML date input) to DD-MM-YYYY
         parts = sale_date.split('-')
         today = f"{parts[2]}-{parts[1]}-{parts[0]}"
     else:
-        today = datetime.now().strftime("%d-%m-%Y")
+        today = _today_text()
 
     field_values = {
         # Vehicle Description
@@ -444,31 +847,6 @@ def fill_apv9t(vehicle_data: dict, output_path: str, sale_date: str = None, form
         'province2': purchaser['province'],
         'purchaserPostalcode': purchaser['postal_code'],
         'dealerRegNo': purchaser['dealer_reg'],
-
-        # Duplicate fields for other copies
-        'registrationNumberA': vehicle_data.get('registration_number', ''),
-        'colourA': vehicle_data.get('colour', ''),
-        'fuelA': vehicle_data.get('fuel_code', 'G'),
-        'modelYearA': vehicle_data.get('year', ''),
-        'makeA': vehicle_data.get('make', ''),
-        'modelA': vehicle_data.get('model', ''),
-        'bodyStyleA': vehicle_data.get('body_style', ''),
-        'vinA': vehicle_data.get('vin', ''),
-        'netWeightA': vehicle_data.get('net_weight', ''),
-        'dateOfSaleA': today,
-        'sellerNameLine1A': vehicle_data.get('owner_name', ''),
-        'sellerNameLine2A': vehicle_data.get('owner_name_2', ''),
-        'sellerAddressLine1A': vehicle_data.get('owner_street', ''),
-        'sellerAddressLine2A': '',
-        'sellerAddressLine3A': vehicle_data.get('owner_city', ''),
-        'province1A': vehicle_data.get('owner_province', 'BC'),
-        'sellerPostalcodeA': vehicle_data.get('owner_postal', ''),
-        'purchaserNameLine1A': purchaser['name'],
-        'purchaserAddressLine1A': purchaser['street'],
-        'purchaserAddressLine2A': purchaser['city'],
-        'province2A': purchaser['province'],
-        'purchaserPostalcodeA': purchaser['postal_code'],
-        'dealerRegNoA': purchaser['dealer_reg'],
     }
 
     # Add optional form fields if provided
@@ -476,72 +854,132 @@ def fill_apv9t(vehicle_data: dict, output_path: str, sale_date: str = None, form
         # Selling price
         if form_data.get('selling_price'):
             field_values['sellingPrice'] = form_data['selling_price']
-            field_values['sellingPriceA'] = form_data['selling_price']
 
         # Odometer reading
         if form_data.get('odometer'):
             field_values['odometerReading'] = form_data['odometer']
-            field_values['odometerReadingA'] = form_data['odometer']
 
         # Km/Miles radio - pypdf uses /Yes for checked
         if form_data.get('odometer_unit') == 'miles':
             field_values['kmMiles'] = '/1'  # miles option
-            field_values['kmMilesA'] = '/1'
         elif form_data.get('odometer'):
             field_values['kmMiles'] = '/0'  # km option
-            field_values['kmMilesA'] = '/0'
 
         # Previous vehicle history checkboxes
         prev_history = form_data.getlist('prev_history') if hasattr(form_data, 'getlist') else form_data.get('prev_history', [])
         if 'none' in prev_history:
             field_values['previousVehicleNoneCheck'] = '/Yes'
-            field_values['previousVehicleNoneCheckA'] = '/Yes'
         if 'rebuilt' in prev_history:
             field_values['previousVehicleCheck1'] = '/Yes'
-            field_values['previousVehicleCheck1A'] = '/Yes'
         if 'salvage' in prev_history:
             field_values['previousVehicleCheck2'] = '/Yes'
-            field_values['previousVehicleCheck2A'] = '/Yes'
         if 'nonrepairable' in prev_history:
             field_values['previousVehicleCheck3'] = '/Yes'
-            field_values['previousVehicleCheck3A'] = '/Yes'
         if 'irreparable' in prev_history:
             field_values['previousVehicleCheck4'] = '/Yes'
-            field_values['previousVehicleCheck4A'] = '/Yes'
 
         # Previously registered outside BC
         if form_data.get('outside_bc') == 'yes':
             field_values['vehiclePreviouslyRegisteredOutsideRadio'] = '/0'
-            field_values['vehiclePreviouslyRegisteredOutsideRadioA'] = '/0'
         elif form_data.get('outside_bc') == 'no':
             field_values['vehiclePreviouslyRegisteredOutsideRadio'] = '/1'
-            field_values['vehiclePreviouslyRegisteredOutsideRadioA'] = '/1'
 
         # New vehicle damage exceeds 20%
         if form_data.get('new_damage_20') == 'yes':
             field_values['newVehicleWhereDamageRadio'] = '/0'
-            field_values['newVehicleWhereDamageRadioA'] = '/0'
         elif form_data.get('new_damage_20') == 'no':
             field_values['newVehicleWhereDamageRadio'] = '/1'
-            field_values['newVehicleWhereDamageRadioA'] = '/1'
 
         # Used vehicle over $2,000 damage
         if form_data.get('used_damage_2k') == 'yes':
             field_values['usedVehicleDamageRadio'] = '/0'
-            field_values['usedVehicleDamageRadioA'] = '/0'
         elif form_data.get('used_damage_2k') == 'no':
             field_values['usedVehicleDamageRadio'] = '/1'
-            field_values['usedVehicleDamageRadioA'] = '/1'
 
-    writer.update_page_form_field_values(writer.pages[0], field_values)
-    for page in writer.pages:
+    # The form repeats every field on its other copies under the same name + 'A'
+    field_values.update({name + 'A': value for name, value in field_values.items()})
+
+    # The key includes the stamp of the parsed template the form is filled from, so a replaced
+    # template is neither served from old fills nor filled from a stale parse
+    stamp, reader, page_fields = _current_template()
+    key = hashlib.blake2b(json.dumps([stamp, field_values], sort_keys=True).encode(),
+                          digest_size=16).hexdigest()
+    cached = FILL_CACHE_DIR / f'{key}.pdf'
+    to_file = isinstance(output, (str, os.PathLike))
+    try:
+        if time.time() - cached.stat().st_mtime < OUTPUT_TTL:
+            if to_file:
+                shutil.copyfile(cached, output)
+            else:
+                with open(cached, 'rb') as src:
+                    shutil.copyfileobj(src, output)
+            return
+    except FileNotFoundError:
+        pass
+
+    writer = _clone_template(reader)
+    # pypdf checks every value against every widget on a page, so only hand each page the
+    # values for fields it has (the unsuffixed copy or the 'A' copies), and skip pages with none
+    for page, names in zip(writer.pages, page_fields):
+        page_values = {name: value for name, value in field_values.items() if name in names}
+        if not page_values:
+            continue
         try:
-            writer.update_page_form_field_values(page, field_values)
+            writer.update_page_form_field_values(page, page_values)
         except Exception:
             pass
 
-    with open(output_path, 'wb') as f:
-        writer.write(f)
+    if to_file:
+        with open(output, 'wb', buffering=PDF_WRITE_BUFFER) as f:
+            writer.write(f)
+    else:
+        start = output.tell()
+        writer.write(output)
+        output.seek(start)
+
+    _store_filled(output, cached)
+
+
+def _store_filled(output, cached: Path) -> None:
+    """Keep a copy of a filled form in the fill cache, evicting expired entries and the oldest
+    beyond FILL_CACHE_SIZE.
+
+    output is the filled form's path, or the file object it was just written to, positioned at
+    its start; that is read through to the end.
+    """
+    partial = None
+    try:
+        # Copy to a temporary file unique to this process and thread, then rename, so a concurrent
+        # reader never sees a partial file and two workers filling the same form never share one
+        fd, partial = tempfile.mkstemp(suffix='.tmp', dir=FILL_CACHE_DIR)
+        with open(fd, 'wb', buffering=PDF_WRITE_BUFFER) as dst:
+            if isinstance(output, (str, os.PathLike)):
+                with open(output, 'rb') as src:
+                    shutil.copyfileobj(src, dst)
+            else:
+                shutil.copyfileobj(output, dst)
+        os.replace(partial, cached)
+        partial = None
+
+        cutoff = time.time() - OUTPUT_TTL
+        entries = []
+        for entry in FILL_CACHE_DIR.glob('*.pdf'):
+            try:
+                entries.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:
+                continue  # Removed by another worker meanwhile
+        entries.sort()
+        for index, (mtime, entry) in enumerate(entries):
+            if mtime < cutoff or index < len(entries) - FILL_CACHE_SIZE:
+                entry.unlink(missing_ok=True)
+    except OSError:
+        pass  # The cache is best effort; the filled form itself is already written
+    finally:
+        if partial:
+            try:
+                os.unlink(partial)
+            except OSError:
+                pass
 
 
 @app.route('/')
@@ -630,10 +1068,9 @@ def settings():
 @app.route('/health')
 def health():
     """Diagnostic endpoint to check system status."""
-    import traceback
     status = {
         'app': 'running',
-        'ocr_available': OCR_AVAILABLE,
+        'ocr_available': _load_ocr(),
         'upload_folder': str(app.config['UPLOAD_FOLDER']),
         'template_exists': APV9T_TEMPLATE.exists(),
         'template_path': str(APV9T_TEMPLATE),
@@ -652,47 +1089,74 @@ def health():
     return jsonify(status)
 
 
-@app.route('/upload', methods=['POST'])
-@login_required
-def upload():
+def _receive_upload():
+    """Validate the uploaded APV250.
+
+    Returns (file, None) on success, or (None, (message, status)) to report back.
+    """
     if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+        return None, ('No file uploaded', 400)
 
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return None, ('No file selected', 400)
 
-    allowed_extensions = ('.pdf', '.jpg', '.jpeg', '.png')
-    if not file.filename.lower().endswith(allowed_extensions):
-        return jsonify({'error': 'Please upload a PDF or image file'}), 400
+    if os.path.splitext(file.filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        return None, ('Please upload a PDF or image file (JPG, PNG)', 400)
 
-    # Save uploaded file
-    filename = secure_filename(file.filename)
-    upload_path = app.config['UPLOAD_FOLDER'] / filename
+    return file, None
 
-    try:
-        file.save(str(upload_path))
-    except Exception as e:
-        return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+
+def _extract_upload(file) -> dict:
+    """Extract APV250 data straight from the upload's stream - it never needs to touch our disk."""
+    return _extract_cached(file.stream, file.filename)
+
+
+def _output_name(vin: str, unique: bool = False) -> str:
+    """Filename for a filled form, from the last 6 characters of the VIN.
+
+    With unique, a random part keeps two uploads of the same vehicle from overwriting each other's file.
+    """
+    tail = vin[-6:]
+    if unique:
+        tail += f"_{secrets.token_hex(4)}"
+    return f"APV9T_Filled_{tail}.pdf"
+
+
+def _new_output(vehicle_data: dict):
+    """Unique filename and path for a filled form; also clears out expired ones."""
+    output_filename = _output_name(vehicle_data.get('vin', 'unknown'), unique=True)
+    cutoff = time.time() - OUTPUT_TTL
+    for old in app.config['UPLOAD_FOLDER'].glob('APV9T_Filled_*.pdf'):
+        try:
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+        except OSError:
+            pass  # Already removed by another request
+    return output_filename, app.config['UPLOAD_FOLDER'] / output_filename
+
+
+@app.route('/upload', methods=['POST'])
+@login_required
+def upload():
+    upload, error = _receive_upload()
+    if error:
+        message, status = error
+        return jsonify({'error': message}), status
 
     try:
         # Extract data from APV250
-        vehicle_data = extract_apv250_data(str(upload_path))
+        vehicle_data = _extract_upload(upload)
 
         if not vehicle_data.get('vin'):
             return jsonify({'error': 'Could not extract vehicle data. Is this a Vehicle Ownership document?'}), 400
 
         # Generate output filename
-        vin = vehicle_data.get('vin', 'unknown')
-        output_filename = f"APV9T_Filled_{vin[-6:]}.pdf"
-        output_path = app.config['UPLOAD_FOLDER'] / output_filename
+        output_filename, output_path = _new_output(vehicle_data)
 
         # Fill the form
         fill_apv9t(vehicle_data, str(output_path))
 
-        # Clean up uploaded file
-        os.remove(str(upload_path))
-
         return jsonify({
             'success': True,
             'data': vehicle_data,
@@ -700,8 +1164,9 @@ def upload():
         })
 
     except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'details': traceback.format_exc()}), 500
+        # Traceback goes to the server log, not the client
+        app.logger.exception('Upload failed')
+        return jsonify({'error': str(e)}), 500
 
 
 @app.route('/download/<filename>')
@@ -717,6 +1182,30 @@ def download(filename):
     return jsonify({'error': 'File not found'}), 404
 
 
+# Manual field -> the PDF fields it fills in (both copies on the form)
+MANUAL_FIELD_MAPPING = {
+    'vin': ('vin', 'vinA'),
+    'registration_number': ('registrationNumber', 'registrationNumberA'),
+    'year': ('modelYear', 'modelYearA'),
+    'make': ('make', 'makeA'),
+    'model': ('model', 'modelA'),
+    'colour': ('colour', 'colourA'),
+    'body_style': ('bodyStyle', 'bodyStyleA'),
+    'net_weight': ('netWeight', 'netWeightA'),
+    'owner_name': ('sellerNameLine1', 'sellerNameLine1A'),
+    'owner_street': ('sellerAddressLine1', 'sellerAddressLine1A'),
+    'owner_city': ('sellerAddressLine3', 'sellerAddressLine3A'),
+    'owner_postal': ('sellerPostalcode', 'sellerPostalcodeA'),
+}
+# Manual fields kept exactly as typed; everything else is upper-cased like the extracted data
+MANUAL_FIELDS_AS_TYPED = frozenset({'vin', 'registration_number'})
+
+
+def _upper(text: str) -> str:
+    """text upper-cased, without building a copy when it already is (as typed values usually are)."""
+    return text if text.isupper() else text.upper()
+
+
 @app.route('/update-pdf', methods=['POST'])
 @login_required
 def update_pdf():
@@ -736,32 +1225,21 @@ def update_pdf():
         return jsonify({'error': 'PDF not found'}), 404
 
     try:
-        # Read the existing PDF and update fields
-        reader = PdfReader(str(file_path))
-        writer = PdfWriter()
-        writer.clone_document_from_reader(reader)
-
-        # Map manual fields to PDF field names
-        field_mapping = {
-            'vin': ['vin', 'vinA'],
-            'registration_number': ['registrationNumber', 'registrationNumberA'],
-            'year': ['modelYear', 'modelYearA'],
-            'make': ['make', 'makeA'],
-            'model': ['model', 'modelA'],
-            'colour': ['colour', 'colourA'],
-            'body_style': ['bodyStyle', 'bodyStyleA'],
-            'net_weight': ['netWeight', 'netWeightA'],
-            'owner_name': ['sellerNameLine1', 'sellerNameLine1A'],
-            'owner_street': ['sellerAddressLine1', 'sellerAddressLine1A'],
-            'owner_city': ['sellerAddressLine3', 'sellerAddressLine3A'],
-            'owner_postal': ['sellerPostalcode', 'sellerPostalcodeA'],
-        }
+        # Read the existing PDF and update fields - incrementally where pypdf supports it,
+        # so the original objects are kept as-is and only the changed fields are appended
+        try:
+            writer = PdfWriter(str(file_path), incremental=True)
+        except TypeError:  # pypdf < 5
+            writer = PdfWriter(clone_from=str(file_path))
 
+        # Map manual fields to PDF field names, upper-casing each value once for all its copies
         field_values = {}
         for field_key, value in manual_fields.items():
-            if field_key in field_mapping:
-                for pdf_field in field_mapping[field_key]:
-                    field_values[pdf_field] = value.upper() if field_key not in ['vin', 'registration_number'] else value
+            if field_key in MANUAL_FIELD_MAPPING:
+                if field_key not in MANUAL_FIELDS_AS_TYPED:
+                    value = _upper(value)
+                for pdf_field in MANUAL_FIELD_MAPPING[field_key]:
+                    field_values[pdf_field] = value
 
         # Update all pages
         for page in writer.pages:
@@ -771,7 +1249,7 @@ def update_pdf():
                 pass
 
         # Save updated PDF
-        with open(str(file_path), 'wb') as f:
+        with open(str(file_path), 'wb', buffering=PDF_WRITE_BUFFER) as f:
             writer.write(f)
 
         return jsonify({
@@ -787,32 +1265,16 @@ def update_pdf():
 @login_required
 def process_check():
     """Process form upload and return JSON with warnings for missing fields."""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
-
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-
-    allowed_extensions = ('.pdf', '.jpg', '.jpeg', '.png')
-    if not file.filename.lower().endswith(allowed_extensions):
-        return jsonify({'error': 'Please upload a PDF or image file'}), 400
-
-    # Save uploaded file
-    filename = secure_filename(file.filename)
-    upload_path = app.config['UPLOAD_FOLDER'] / filename
-
-    try:
-        file.save(str(upload_path))
-    except Exception as e:
-        return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+    upload, error = _receive_upload()
+    if error:
+        message, status = error
+        return jsonify({'error': message}), status
 
     try:
         # Extract data
-        vehicle_data = extract_apv250_data(str(upload_path))
+        vehicle_data = _extract_upload(upload)
 
         if not vehicle_data.get('vin') and not vehicle_data.get('registration_number'):
-            os.remove(str(upload_path))
             return jsonify({'error': 'Could not extract vehicle data. Is this a Vehicle Ownership document?'}), 400
 
         # Check for missing/important fields
@@ -835,9 +1297,7 @@ def process_check():
                 missing_fields.append(label)
 
         # Generate output filename
-        vin = vehicle_data.get('vin', 'unknown')
-        output_filename = f"APV9T_Filled_{vin[-6:] if len(vin) >= 6 else vin}.pdf"
-        output_path = app.config['UPLOAD_FOLDER'] / output_filename
+        output_filename, output_path = _new_output(vehicle_data)
 
         # Get sale date from form
         sale_date = request.form.get('sale_date')
@@ -845,9 +1305,6 @@ def process_check():
         # Fill the form
         fill_apv9t(vehicle_data, str(output_path), sale_date, request.form)
 
-        # Clean up uploaded file
-        os.remove(str(upload_path))
-
         return jsonify({
             'success': True,
             'data': vehicle_data,
@@ -863,53 +1320,32 @@ def process_check():
 @login_required
 def process():
     """Process form upload and return filled PDF directly."""
-    if 'file' not in request.files:
-        return "No file uploaded", 400
-
-    file = request.files['file']
-    if file.filename == '':
-        return "No file selected", 400
-
-    allowed_extensions = ('.pdf', '.jpg', '.jpeg', '.png')
-    if not file.filename.lower().endswith(allowed_extensions):
-        return "Please upload a PDF or image file (JPG, PNG)", 400
-
-    # Save uploaded file
-    filename = secure_filename(file.filename)
-    upload_path = app.config['UPLOAD_FOLDER'] / filename
-
-    try:
-        file.save(str(upload_path))
-    except Exception as e:
-        return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+    upload, error = _receive_upload()
+    if error:
+        message, status = error
+        return message, status
 
     try:
         # Extract data from APV250
-        vehicle_data = extract_apv250_data(str(upload_path))
+        vehicle_data = _extract_upload(upload)
 
         if not vehicle_data.get('vin'):
-            os.remove(str(upload_path))
             return "Could not extract vehicle data. Is this a Vehicle Ownership document?", 400
 
-        # Generate output filename
-        vin = vehicle_data.get('vin', 'unknown')
-        output_filename = f"APV9T_Filled_{vin[-6:]}.pdf"
-        output_path = app.config['UPLOAD_FOLDER'] / output_filename
-
         # Get sale date from form (if provided)
         sale_date = request.form.get('sale_date')
 
-        # Fill the form with optional fields
-        fill_apv9t(vehicle_data, str(output_path), sale_date, request.form)
-
-        # Clean up uploaded file
-        os.remove(str(upload_path))
+        # Fill the form with optional fields - in memory, since nothing links to it afterwards
+        pdf = io.BytesIO()
+        fill_apv9t(vehicle_data, pdf, sale_date, request.form)
+        pdf.seek(0)
 
         # Return the filled PDF directly
         return send_file(
-            str(output_path),
+            pdf,
+            mimetype='application/pdf',
             as_attachment=True,
-            download_name=output_filename
+            download_name=_output_name(vehicle_data['vin'])
         )
 
     except Exception as e:
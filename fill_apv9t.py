@@ -22,81 +22,114 @@ PURCHASER = {
     "dealer_reg": "D50035",
 }
 
+# APV250 field patterns, compiled once
+_RE_REG = re.compile(r'Registration Number[:\s]+(\d+)')
+_RE_VIN = re.compile(r'VIN[:\s]+([A-HJ-NPR-Z0-9]{17})')
+_RE_YEAR = re.compile(r'Year[:\s]+(\d{4})')
+_RE_MAKE = re.compile(r'Make[:\s]+([A-Za-z/]+)')
+_RE_MODEL = re.compile(r'Model[:\s]+([A-Za-z0-9]+)')
+_RE_BODY = re.compile(r'Body Style[:\s]+([A-Za-z0-9 ]+?)(?:\n|VIC)')
+_RE_COLOUR = re.compile(r'Colour[:\s]+([A-Za-z]+)')
+_RE_FUEL = re.compile(r'Fuel Type[:\s]+([A-Za-z]+)')
+_RE_NET_WEIGHT = re.compile(r'Net Weight \(kg\)[:\s]+([\d,]+)')
+_RE_NUM_OWNERS = re.compile(r'Number of Owners[:\s]+(\d+)')
+_RE_OWNERS = re.compile(r'(?:Registered Owner|Owner)\s*\n([A-Z]+(?:\s+[A-Z]+)+)\n')
+_RE_COOWNER = re.compile(r'Owner\s*\n[A-Z\s]+\n([A-Z]+(?:\s+[A-Z]+)+)\n')
+# Cheap check for the "BC <postal code>" the address patterns end with; they backtrack a lot
+_RE_BC_POSTAL = re.compile(r'\sBC\s+[A-Z]\d[A-Z]\s?\d[A-Z]\d', re.IGNORECASE)
+_RE_OWNER_ADDR = re.compile(r'Owner\s*\n[A-Z\s]+\n([\d\-]+[A-Z0-9\s\.]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT)\.?)\s*\n([A-Z\s]+)\s+BC\s+([A-Z]\d[A-Z]\s?\d[A-Z]\d)', re.IGNORECASE)
+_RE_ADDR = re.compile(r'(\d+[\-\d]*\s+[A-Z0-9\s\.]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT)\.?)\s*\n([A-Z\s]+)\s+BC\s+([A-Z]\d[A-Z]\s?\d[A-Z]\d)', re.IGNORECASE)
+
+FUEL_CODES = {
+    'GASOLINE': 'G',
+    'DIESEL': 'D',
+    'ELECTRIC': 'E',
+    'HYBRID': 'L',
+    'PROPANE': 'P',
+    'NATURAL': 'N',
+}
+
+
+def _page_texts(pdf_path: str):
+    """Yield the text of each page of a PDF, one page at a time."""
+    reader = PdfReader(pdf_path)
+    for page in reader.pages:
+        yield page.extract_text()
+
 
 def extract_apv250_data(pdf_path: str) -> dict:
     """Extract vehicle and owner data from APV250 PDF text."""
-    reader = PdfReader(pdf_path)
+    # Combine text page by page, stopping once the VIN and owner address are found
+    # (the ownership details are on page 1, so later pages rarely need reading)
+    parts = []
+    data = {}
+    for page_text in _page_texts(pdf_path):
+        parts.append(page_text)
+        data = _parse_apv250_text("\n".join(parts) + "\n")
+        if data.get('vin') and data.get('owner_street'):
+            break
+    return data
 
-    # Combine text from all pages
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
 
+def _parse_apv250_text(text: str) -> dict:
+    """Pull the APV250 fields out of the document text."""
     data = {}
 
     # Registration Number
-    match = re.search(r'Registration Number[:\s]+(\d+)', text)
+    match = _RE_REG.search(text)
     if match:
         data['registration_number'] = match.group(1)
 
     # VIN
-    match = re.search(r'VIN[:\s]+([A-HJ-NPR-Z0-9]{17})', text)
+    match = _RE_VIN.search(text)
     if match:
         data['vin'] = match.group(1)
 
     # Year
-    match = re.search(r'Year[:\s]+(\d{4})', text)
+    match = _RE_YEAR.search(text)
     if match:
         data['year'] = match.group(1)
 
     # Make
-    match = re.search(r'Make[:\s]+([A-Za-z/]+)', text)
+    match = _RE_MAKE.search(text)
     if match:
         data['make'] = match.group(1).split('/')[0].upper()
 
     # Model
-    match = re.search(r'Model[:\s]+([A-Za-z0-9]+)', text)
+    match = _RE_MODEL.search(text)
     if match:
         data['model'] = match.group(1).upper()
 
     # Body Style
-    match = re.search(r'Body Style[:\s]+([A-Za-z0-9 ]+?)(?:\n|VIC)', text)
+    match = _RE_BODY.search(text)
     if match:
         data['body_style'] = match.group(1).strip().upper()
 
     # Colour
-    match = re.search(r'Colour[:\s]+([A-Za-z]+)', text)
+    match = _RE_COLOUR.search(text)
     if match:
         data['colour'] = match.group(1).upper()
 
     # Fuel Type
-    match = re.search(r'Fuel Type[:\s]+([A-Za-z]+)', text)
+    match = _RE_FUEL.search(text)
     if match:
         fuel = match.group(1).upper()
         # Convert to fuel code
-        fuel_codes = {
-            'GASOLINE': 'G',
-            'DIESEL': 'D',
-            'ELECTRIC': 'E',
-            'HYBRID': 'L',
-            'PROPANE': 'P',
-            'NATURAL': 'N',
-        }
-        data['fuel_code'] = fuel_codes.get(fuel, 'G')
+        data['fuel_code'] = FUEL_CODES.get(fuel, 'G')
         data['fuel_type'] = fuel
 
     # Net Weight
-    match = re.search(r'Net Weight \(kg\)[:\s]+([\d,]+)', text)
+    match = _RE_NET_WEIGHT.search(text)
     if match:
         data['net_weight'] = match.group(1).replace(',', '')
 
     # Owner Name (format: SURNAME FIRSTNAME)
     # Check for multiple owners (Number of Owners field)
-    num_owners_match = re.search(r'Number of Owners[:\s]+(\d+)', text)
+    num_owners_match = _RE_NUM_OWNERS.search(text)
     num_owners = int(num_owners_match.group(1)) if num_owners_match else 1
 
     # Extract owner names - look for names after "Registered Owner" or "Owner"
-    owner_matches = re.findall(r'(?:Registered Owner|Owner)\s*\n([A-Z]+(?:\s+[A-Z]+)+)\n', text)
+    owner_matches = _RE_OWNERS.findall(text)
     if owner_matches:
         data['owner_name'] = owner_matches[0].strip()
         # If there are multiple owners, try to find second name
@@ -104,21 +137,14 @@ def extract_apv250_data(pdf_path: str) -> dict:
             data['owner_name_2'] = owner_matches[1].strip()
         elif num_owners > 1:
             # Try alternative pattern for co-owner
-            coowner_match = re.search(r'Owner\s*\n[A-Z\s]+\n([A-Z]+(?:\s+[A-Z]+)+)\n', text)
+            coowner_match = _RE_COOWNER.search(text)
             if coowner_match and coowner_match.group(1).strip() != data['owner_name']:
                 data['owner_name_2'] = coowner_match.group(1).strip()
 
-    # Owner Address - look for the pattern after owner name
-    # Try to find street address
-    match = re.search(r'Owner\s*\n[A-Z\s]+\n([\d\-]+[A-Z0-9\s\.]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT)\.?)\s*\n([A-Z\s]+)\s+BC\s+([A-Z]\d[A-Z]\s?\d[A-Z]\d)', text, re.IGNORECASE)
-    if match:
-        data['owner_street'] = match.group(1).strip()
-        data['owner_city'] = match.group(2).strip()
-        data['owner_province'] = 'BC'
-        data['owner_postal'] = match.group(3).strip()
-    else:
-        # Alternative pattern
-        match = re.search(r'(\d+[\-\d]*\s+[A-Z0-9\s\.]+(?:ST|AVE|RD|DR|BLVD|WAY|CRES|PL|CT|LANE|CRT)\.?)\s*\n([A-Z\s]+)\s+BC\s+([A-Z]\d[A-Z]\s?\d[A-Z]\d)', text, re.IGNORECASE)
+    # Owner Address - look for the pattern after owner name, then anywhere.
+    # Both end in "BC <postal code>", so skip them when the text has none
+    if _RE_BC_POSTAL.search(text):
+        match = _RE_OWNER_ADDR.search(text) or _RE_ADDR.search(text)
         if match:
             data['owner_street'] = match.group(1).strip()
             data['owner_city'] = match.group(2).strip()
@@ -140,7 +166,6 @@ def fill_apv9t(template_path: str, output_path: str, vehicle_data: dict) -> None
     today = datetime.now().strftime("%d-%m-%Y")
 
     # Prepare field values
-    # Note: Some fields appear twice (with and without 'A' suffix) for different copies
     field_values = {
         # Vehicle Description
         'registrationNumber': vehicle_data.get('registration_number', ''),
@@ -172,45 +197,22 @@ def fill_apv9t(template_path: str, output_path: str, vehicle_data: dict) -> None
         'province2': PURCHASER['province'],
         'purchaserPostalcode': PURCHASER['postal_code'],
         'dealerRegNo': PURCHASER['dealer_reg'],
-
-        # Duplicate fields for other copies (with 'A' suffix)
-        'registrationNumberA': vehicle_data.get('registration_number', ''),
-        'colourA': vehicle_data.get('colour', ''),
-        'fuelA': vehicle_data.get('fuel_code', 'G'),
-        'modelYearA': vehicle_data.get('year', ''),
-        'makeA': vehicle_data.get('make', ''),
-        'modelA': vehicle_data.get('model', ''),
-        'bodyStyleA': vehicle_data.get('body_style', ''),
-        'vinA': vehicle_data.get('vin', ''),
-        'netWeightA': vehicle_data.get('net_weight', ''),
-        'dateOfSaleA': today,
-        'sellerNameLine1A': vehicle_data.get('owner_name', ''),
-        'sellerNameLine2A': vehicle_data.get('owner_name_2', ''),  # Co-owner if exists
-        'sellerAddressLine1A': vehicle_data.get('owner_street', ''),
-        'sellerAddressLine2A': '',  # Leave blank
-        'sellerAddressLine3A': vehicle_data.get('owner_city', ''),
-        'province1A': vehicle_data.get('owner_province', 'BC'),
-        'sellerPostalcodeA': vehicle_data.get('owner_postal', ''),
-        'purchaserNameLine1A': PURCHASER['name'],
-        'purchaserAddressLine1A': PURCHASER['street'],
-        'purchaserAddressLine2A': PURCHASER['city'],
-        'province2A': PURCHASER['province'],
-        'purchaserPostalcodeA': PURCHASER['postal_code'],
-        'dealerRegNoA': PURCHASER['dealer_reg'],
     }
 
-    # Update form fields
-    writer.update_page_form_field_values(writer.pages[0], field_values)
+    # Every field appears again on the other copies, under the same name with an 'A' suffix
+    field_values.update({name + 'A': value for name, value in field_values.items()})
 
-    # Try to update all pages (multi-page form)
-    for i, page in enumerate(writer.pages):
+    # Update form fields on every page that has any (multi-page form; the backs are plain text)
+    for page in writer.pages:
+        if '/Annots' not in page:
+            continue
         try:
             writer.update_page_form_field_values(page, field_values)
         except Exception:
             pass
 
     # Save filled PDF
-    with open(output_path, 'wb') as f:
+    with open(output_path, 'wb', buffering=1024 * 1024) as f:
         writer.write(f)
 
 